@@ -0,0 +1,29 @@
+# Examples and notes shown at the end of `python3 -msogs --help`; this is kept separate so that it
+# only gets loaded when help is actually requested.
+
+EPILOG = """
+
+Examples:
+
+    # Add new room 'xyz':
+    python3 -msogs --add-room xyz --name 'XYZ Room'
+
+    # Add 2 admins to each of rooms 'xyz' and 'abc':
+    python3 -msogs --rooms abc xyz --admin --add-moderators 050123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef 0500112233445566778899aabbccddeeff00112233445566778899aabbccddeeff
+
+     # Add a global moderator visible as a moderator of all rooms:
+    python3 -msogs --add-moderators 050123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef --rooms=+ --visibility=visible
+
+    # Set default read/write True and upload False on all rooms
+    python3 -msogs --add-perms rw --remove-perms u --rooms='*'
+
+    # Remove overrides for user 0501234... on all rooms
+    python3 -msogs --clear-perms rwua --rooms='*' --users 050123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef
+
+     # List room info:
+    python3 -msogs -L
+
+A sogs.ini will be loaded from the current directory, if one exists.  You can override this by
+specifying a path to the config file to load in the SOGS_CONFIG environment variable.
+
+"""  # noqa: E501
@@ -0,0 +1,921 @@
+from argparse import ArgumentParser as AP, RawDescriptionHelpFormatter, Action, SUPPRESS
+import atexit
+import re
+import string
+import sys
+
+from .. import __version__ as version
+
+
+class CrudeStringUnescape(Action):
+    """Crude class for potentially-escaped parameters; this supports '\\\\' and '\\n'"""
+
+    escapes = {'\\': '\\', 'n': '\n'}
+    pat = re.compile(r'\\([\\n])')
+
+    def __init__(self, option_strings, dest, nargs=None, **kwargs):
+        if nargs is not None:
+            raise ValueError("nargs not allowed")
+        super().__init__(option_strings, dest, **kwargs)
+
+    def __call__(self, parser, ns, value, option_string=None):
+        setattr(ns, self.dest, self.pat.sub(lambda x: self.escapes[x[1]], value))
+
+
+class StoreVisibility(Action):
+    """Action for --visibility and its --visible/--hidden aliases (which store their `const`); this
+    rejects a visibility that conflicts with one given earlier rather than letting the last win"""
+
+    def __call__(self, parser, ns, value, option_string=None):
+        if self.const is not None:
+            value = self.const
+        current = getattr(ns, self.dest)
+        if current is not None and current != value:
+            parser.error(f"argument {option_string}: conflicts with earlier visibility '{current}'")
+        setattr(ns, self.dest, value)
+
+
+# All of the supported options, in --help order.  Each value is the (flags, kwargs) pair to pass
+# to add_argument.
+options = {
+    'version': (('--version', '-V'), dict(action='version', version=f'PySOGS {version}')),
+    'add_room': (('--add-room',), dict(help="Add a room with the given token", metavar='TOKEN')),
+    'name': (
+        ('--name',),
+        dict(
+            help="Set or updates a room's name (with --add-room or --rooms); if omitted when "
+            "adding a room then uses the token name"
+        ),
+    ),
+    'description': (
+        ('--description',),
+        dict(
+            action=CrudeStringUnescape,
+            help="Sets or updates a room's description (with --add-room or --rooms)",
+        ),
+    ),
+    'delete_room': (
+        ('--delete-room',),
+        dict(help="Delete the room with the given token", metavar='TOKEN'),
+    ),
+    'add_moderators': (
+        ('--add-moderators',),
+        dict(
+            nargs='+',
+            metavar='SESSIONID',
+            help="Add the given Session ID(s) as a moderator of the room given by --rooms",
+        ),
+    ),
+    'delete_moderators': (
+        ('--delete-moderators',),
+        dict(
+            nargs='+',
+            metavar='SESSIONID',
+            help="Delete the the given Session ID(s) as moderator and admins of the room given by "
+            "--rooms",
+        ),
+    ),
+    'users': (
+        ('--users',),
+        dict(
+            help="One or more specific users to set permissions for with --add-perms, "
+            "--remove-perms, --clear-perms.  If omitted then the room default permissions will be "
+            "set for the given room(s) instead.",
+            nargs='+',
+            metavar='SESSIONID',
+        ),
+    ),
+    'add_perms': (
+        ("--add-perms",),
+        dict(
+            help="With --add-room or --rooms, set these permissions to true; takes a string of 1-4 "
+            "of the letters \"rwua\" for [r]ead, [w]rite, [u]pload, and [a]ccess."
+        ),
+    ),
+    'remove_perms': (
+        ("--remove-perms",),
+        dict(
+            help="With --add-room or --rooms, set these permissions to false; takes the same "
+            "string as --add-perms, but denies the listed permissions rather than granting them."
+        ),
+    ),
+    'clear_perms': (
+        ("--clear-perms",),
+        dict(
+            help="With --add-room or --rooms, clear room or user overrides on these permissions, "
+            "returning them to the default setting.  Takes the same argument as --add-perms."
+        ),
+    ),
+    'admin': (
+        ('--admin',),
+        dict(
+            action='store_true',
+            help="Add the given moderators as admins rather than ordinary moderators",
+        ),
+    ),
+    'rooms': (
+        ('--rooms',),
+        dict(
+            nargs='+',
+            metavar='TOKEN',
+            help="Room(s) to use when adding/removing moderators/admins or when setting "
+            "permissions. If a single room name of '+' is given then the user will be "
+            "added/removed as a global admin/moderator. '+' is not valid for setting permissions. "
+            "If a single room name of '*' is given then the changes take effect on each of the "
+            "server's current rooms.",
+        ),
+    ),
+    'visibility': (
+        ('--visibility',),
+        dict(
+            action=StoreVisibility,
+            choices=('visible', 'hidden'),
+            help="Whether an added moderator/admins' status is publicly visible or hidden from "
+            "public users.  The default is visible for room mods, and hidden for global mods",
+        ),
+    ),
+    # Older aliases for --visibility=visible and --visibility=hidden:
+    'visible': (
+        ('--visible',),
+        dict(action=StoreVisibility, nargs=0, dest='visibility', const='visible', help=SUPPRESS),
+    ),
+    'hidden': (
+        ('--hidden',),
+        dict(action=StoreVisibility, nargs=0, dest='visibility', const='hidden', help=SUPPRESS),
+    ),
+    'list_rooms': (
+        ("--list-rooms", "-L"),
+        dict(action='store_true', help="List current rooms and basic stats"),
+    ),
+    'list_global_mods': (
+        ('--list-global-mods', '-M'),
+        dict(action='store_true', help="List global moderators/admins"),
+    ),
+    'verbose': (
+        ("--verbose", "-v"),
+        dict(
+            action='store_true',
+            help="Show more details for some commands, such as showing moderators/admins in room "
+            "details",
+        ),
+    ),
+    'yes': (
+        ("--yes",),
+        dict(
+            action='store_true', help="Don't prompt for confirmation for some commands, just do it"
+        ),
+    ),
+    'initialize': (
+        ("--initialize",),
+        dict(
+            action='store_true',
+            help="Initialize database and private key if they do not exist; advanced use only.",
+        ),
+    ),
+    'upgrade': (
+        ("--upgrade", "-U"),
+        dict(
+            action="store_true",
+            help="Perform any required database upgrades.  If database upgrades are required then "
+            "other commands will exit with an error message until this flag is used.  Note that "
+            "this is normally not required: database upgrades are performed automatically during "
+            "sogs daemon startup.",
+        ),
+    ),
+    'check_upgrades': (
+        ("--check-upgrades",),
+        dict(
+            action="store_true",
+            help="Check whether database upgrades are required then exit.  The exit code is 0 if "
+            "no upgrades are needed, 5 if required upgrades were detected.",
+        ),
+    ),
+}
+
+# The options accepted by each action (in addition to the general --help, --version, --verbose,
+# and --yes options).
+action_options = {
+    'add_room': ('add_room', 'name', 'description', 'add_perms', 'remove_perms', 'clear_perms'),
+    'delete_room': ('delete_room',),
+    'update_room': (
+        'rooms',
+        'name',
+        'description',
+        'add_moderators',
+        'delete_moderators',
+        'users',
+        'add_perms',
+        'remove_perms',
+        'clear_perms',
+        'admin',
+        'visibility',
+        'visible',
+        'hidden',
+    ),
+    'list_rooms': ('list_rooms',),
+    'list_global_mods': ('list_global_mods',),
+    'initialize': ('initialize',),
+    'upgrade': ('upgrade',),
+    'check_upgrades': ('check_upgrades',),
+}
+
+# Command-line flags that unambiguously select an action:
+action_flags = {
+    '--add-room': 'add_room',
+    '--delete-room': 'delete_room',
+    '--rooms': 'update_room',
+    '--add-moderators': 'update_room',
+    '--delete-moderators': 'update_room',
+    '--users': 'update_room',
+    '--list-rooms': 'list_rooms',
+    '-L': 'list_rooms',
+    '--list-global-mods': 'list_global_mods',
+    '-M': 'list_global_mods',
+    '--initialize': 'initialize',
+    '--upgrade': 'upgrade',
+    '-U': 'upgrade',
+    '--check-upgrades': 'check_upgrades',
+}
+
+
+def help_requested():
+    """
+    Returns true if --help (or -h, possibly combined with other short flags) appears in the
+    command-line arguments; we only need to set up the help epilog and formatting if so.
+    """
+    for arg in sys.argv[1:]:
+        if arg == '--':
+            break
+        if arg.startswith('--'):
+            if len(arg) >= 4 and '--help'.startswith(arg):
+                return True
+        elif arg.startswith('-') and 'h' in arg:
+            return True
+    return False
+
+
+def sniff_action():
+    """
+    Makes a quick pass over the command-line arguments looking for the action being invoked so that
+    we only have to build a parser for that action's options.  Returns None if we need the full
+    parser: for --help/--version, if no (or more than one) action is found, or if we can't tell
+    (e.g. for combined or abbreviated flags); the full parser handles all of those properly.
+    """
+    if help_requested():
+        return None
+
+    actions = set()
+    for arg in sys.argv[1:]:
+        if arg == '--':
+            break
+        if arg in ('-V', '--version'):
+            return None
+        action = action_flags.get(arg.split('=', 1)[0])
+        if action is not None:
+            actions.add(action)
+
+    return actions.pop() if len(actions) == 1 else None
+
+
+class ReducedParserError(Exception):
+    pass
+
+
+class ReducedParser(AP):
+    """
+    Parser for the options of a single action.  Rather than reporting errors itself this raises a
+    ReducedParserError so that the arguments can be re-parsed with the full parser, which gives the
+    same diagnostics (and usage) as always.
+    """
+
+    def error(self, message):
+        raise ReducedParserError(message)
+
+
+def build_parser(action=None):
+    """
+    Builds an argument parser accepting the options of `action`, or all options if action is None.
+    Options not accepted by the action still get their default values set in the parsed
+    arguments.  The action parser does not accept abbreviated options, as an abbreviation that is
+    unique among the action's options could be ambiguous among all of the options.
+    """
+    ap = AP() if action is None else ReducedParser(allow_abbrev=False)
+    if help_requested():
+        from ._epilog import EPILOG
+
+        ap.epilog = EPILOG
+        ap.formatter_class = RawDescriptionHelpFormatter
+
+    # --version, --verbose, and --yes are accepted by everything
+    wanted = options
+    if action is not None:
+        wanted = {'version', 'verbose', 'yes', *action_options[action]}
+    for name, (flags, kwargs) in options.items():
+        if name in wanted:
+            ap.add_argument(*flags, **kwargs)
+        else:
+            default = False if kwargs.get('action') == 'store_true' else None
+            ap.set_defaults(**{kwargs.get('dest', name): default})
+
+    return ap
+
+
+def parse_args():
+    """
+    Parses the command-line arguments, using a parser with just the options of the invoked action
+    when we can tell what that is.  If that parser fails or finds any arguments it doesn't know
+    about then we fall back to the full parser to parse (or reject) the arguments.
+    """
+    action = sniff_action()
+    if action is not None:
+        try:
+            args, unknown = build_parser(action).parse_known_args()
+            if not unknown:
+                return args
+        except ReducedParserError:
+            pass
+
+    return build_parser().parse_args()
+
+
+# Deletes all of the characters permitted in a room token, so that anything left over is invalid
+room_token_chars = str.maketrans('', '', string.ascii_letters + string.digits + '_-')
+hex_digits = frozenset('0123456789abcdefABCDEF')
+
+
+def room_token_valid(room):
+    if not (1 <= len(room) <= 64 and not room.translate(room_token_chars)):
+        print(
+            "Error: room tokens may only contain a-z, A-Z, 0-9, _, and - characters",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+def session_id_valid(sid):
+    # Equivalent to matching [01]5[0-9a-fA-F]{64}, but rejects bad lengths/prefixes up front and
+    # does the hex check in a single C-level set operation.
+    return len(sid) == 66 and sid[0] in '01' and sid[1] == '5' and hex_digits.issuperset(sid[2:])
+
+
+def session_ids_valid(session_ids):
+    for sid in session_ids:
+        if not session_id_valid(sid):
+            print(f"Error: '{sid}' is not a valid session id", file=sys.stderr)
+            sys.exit(1)
+
+
+def perm_flag_to_word(char):
+    if char == 'r':
+        return "read"
+    if char == 'w':
+        return "write"
+    if char == 'u':
+        return "upload"
+    if char == 'a':
+        return "accessible"
+
+    print(f"Error: invalid permission flag '{char}'", file=sys.stderr)
+    sys.exit(1)
+
+
+def parse_perm_flags(args):
+    """
+    Parses the --add-perms, --remove-perms, and --clear-perms arguments into a dict of permission
+    names to the value to set (True, False, or None to clear).
+    """
+    perms = {}
+    for flags, perm_setting in (
+        (args.add_perms, True),
+        (args.remove_perms, False),
+        (args.clear_perms, None),
+    ):
+        for char in flags or '':
+            perm_type = perm_flag_to_word(char)
+            if perm_type in perms:
+                print(
+                    f"Error: permission flag '{char}' in more than one permission set "
+                    "(add/remove/clear)",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            perms[perm_type] = perm_setting
+    return perms
+
+
+def check_args(args):
+    """
+    Checks the parsed arguments for incompatible or missing options, exiting with an error if
+    there are any.  Returns true if the arguments are room modifications (i.e. for --rooms).
+    """
+    update_room = not args.add_room and (
+        args.description is not None
+        or args.name is not None
+        or args.add_moderators
+        or args.delete_moderators
+        or args.add_perms
+        or args.remove_perms
+        or args.clear_perms
+    )
+    incompat = [
+        ('--add-room', args.add_room),
+        ('--delete-room', args.delete_room),
+        ('room modifiers', update_room),
+        ('--list-rooms', args.list_rooms),
+        ('--list-global-mods', args.list_global_mods),
+        ('--initialize', args.initialize),
+        ('--upgrade', args.upgrade),
+        ('--check-upgrades', args.check_upgrades),
+    ]
+    for i in range(1, len(incompat)):
+        for j in range(0, i):
+            if incompat[j][1] and incompat[i][1]:
+                print(
+                    f"Error: {incompat[j][0]} and {incompat[i][0]} are incompatible",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+    if update_room and not args.rooms:
+        print(
+            "A room must be specified (using --rooms) when updating permissions or room details",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    if args.rooms and not update_room:
+        # If we have --rooms but didn't recognize any of the `update_rooms` options then that means
+        # `--rooms` was specify with some action (e.g. `--initialize`) that doesn't support --rooms:
+        print("Error: --rooms specified without a room modification option", file=sys.stderr)
+        sys.exit(1)
+    if not any(enabled for _, enabled in incompat):
+        print("Error: no action given", file=sys.stderr)
+        build_parser().print_usage()
+        sys.exit(1)
+
+    if args.add_room:
+        room_token_valid(args.add_room)
+    session_ids_valid([*(args.add_moderators or ()), *(args.delete_moderators or ())])
+
+    return update_room
+
+
+def init_db(args):
+    """
+    Initializes (and, depending on the arguments, creates or upgrades) the database, exiting with
+    an error if that fails.  Returns true if the database was created or upgraded.
+    """
+    from .. import config, crypto, db
+    from ..migrations.exc import DatabaseUpgradeRequired
+    from sqlalchemy_utils import database_exists
+
+    db_updated = False
+    try:
+        if not args.initialize and not database_exists(config.DB_URL):
+            raise RuntimeError(f"{config.DB_URL} database does not exist")
+
+        if args.initialize:
+            crypto.persist_privkey()
+
+        db.init_engine(sogs_skip_init=True)
+
+        db_updated = db.database_init(create=args.initialize, upgrade=args.upgrade)
+
+    except DatabaseUpgradeRequired as e:
+        print(
+            f"Database upgrades are required: {e}\n\n"
+            "You can attempt the upgrade using the --upgrade flag; see --help for details."
+        )
+        sys.exit(5)
+
+    except Exception as e:
+        print(
+            f"""
+
+SOGS initialization failed: {e}.
+
+
+Perhaps you need to specify a SOGS_CONFIG path or use one of the --upgrade/--initialize options?
+Try --help for additional information.
+"""
+        )
+        sys.exit(1)
+
+    return db_updated
+
+
+# The database connection opened by open_db(), if any
+db_conn = None
+
+
+def open_db(readonly=False):
+    """Opens the database connection used by the model code.  This (and the web/model imports it
+    implies) is deferred until an action that actually queries the database needs it.  Actions that
+    only list things should pass readonly=True.
+
+    This must be called before importing anything from `..model`: the model modules import `web`,
+    which in turn imports the model (via the routes), and so the import only works if `web` is
+    loaded first."""
+    global db_conn
+    from .. import db, web
+
+    close_db()
+    db_conn = web.appdb = db.get_conn(readonly=readonly)
+
+
+def close_db():
+    """Closes the database connection opened by open_db(), if there is one."""
+    global db_conn
+    if db_conn is not None:
+        db_conn.close()
+        db_conn = None
+
+
+atexit.register(close_db)
+
+
+# Activity periods reported by format_room, in seconds
+active_cutoffs = [x * 86400 for x in (1, 7, 14, 30)]
+
+
+def format_room(room, stats=None, *, verbose=False):
+    """Returns the room details report as a string.  `stats` are the room's stats from
+    room.stats(active_cutoffs) (or get_rooms_with_stats); they are queried if not given.  If
+    `verbose` is true then the room's moderators and admins are listed as well, in which case
+    `stats` must have been retrieved with `list_moderators=True`."""
+    from .. import config, crypto
+
+    if stats is None:
+        stats = room.stats(active_cutoffs, list_moderators=verbose)
+
+    msgs, msgs_size = stats['messages']
+    files, files_size = stats['attachments']
+    reactions = sorted(stats['reactions'], key=lambda x: x[1], reverse=True)
+    r_total = sum(x[1] for x in reactions)
+
+    msgs_size /= 1_000_000
+    files_size /= 1_000_000
+
+    active = stats['active_users']
+    n_m, n_a, n_hm, n_ha = stats['moderator_counts']
+    admins = n_a + n_ha
+    mods = n_m + n_hm
+
+    perms = "{}read, {}write, {}upload, {}accessible".format(
+        "+" if room.default_read else "-",
+        "+" if room.default_write else "-",
+        "+" if room.default_upload else "-",
+        "+" if room.default_accessible else "-",
+    )
+
+    out = [
+        f"""
+{room.token}
+{"=" * len(room.token)}
+Name: {room.name}
+Description: {room.description}
+URL: {config.URL_BASE}/{room.token}?public_key={crypto.server_pubkey_hex}
+Messages: {msgs} ({msgs_size:.1f} MB)
+Attachments: {files} ({files_size:.1f} MB)
+Reactions: {r_total}; top 5: {', '.join(f"{r} ({c})" for r, c in reactions[0:5])}
+Active users: {active[0]} (1d), {active[1]} (7d), {active[2]} (14d), {active[3]} (30d)
+Default permissions: {perms}
+Moderators: {admins} admins ({n_ha} hidden), {mods} moderators ({n_hm} hidden)"""
+    ]
+    if verbose and admins + mods:
+        m, a, hm, ha = stats['moderators']
+        out.append(":\n")
+        out.extend(f"    - {id} (admin)\n" for id in a)
+        out.extend(f"    - {id} (hidden admin)\n" for id in ha)
+        out.extend(f"    - {id} (moderator)\n" for id in m)
+        out.extend(f"    - {id} (hidden moderator)\n" for id in hm)
+    else:
+        out.append("\n")
+
+    return "".join(out)
+
+
+def add_room(args, perms):
+    """Implements --add-room"""
+    open_db()
+
+    from ..model import Room
+    from ..model.exc import AlreadyExists
+
+    try:
+        room = Room.create(
+            token=args.add_room, name=args.name or args.add_room, description=args.description
+        )
+        if "read" in perms:
+            room.default_read = perms["read"]
+        if "write" in perms:
+            room.default_write = perms["write"]
+        if "accessible" in perms:
+            room.default_accessible = perms["accessible"]
+        if "upload" in perms:
+            room.default_upload = perms["upload"]
+
+    except AlreadyExists:
+        print(f"Error: room '{args.add_room}' already exists!", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(f"Created room {args.add_room}:\n" + format_room(room, verbose=args.verbose))
+
+
+def delete_room(args):
+    """Implements --delete-room"""
+    open_db()
+
+    from ..model import Room
+    from ..model.exc import NoSuchRoom
+
+    try:
+        room = Room(token=args.delete_room)
+    except NoSuchRoom:
+        print(f"Error: no such room '{args.delete_room}'", file=sys.stderr)
+        sys.exit(1)
+
+    sys.stdout.write(format_room(room, verbose=args.verbose))
+    if args.yes:
+        res = "y"
+    else:
+        res = input("Are you sure you want to delete this room? [yN] ")
+    if res.startswith("y") or res.startswith("Y"):
+        room.delete()
+        print("Room deleted.")
+    else:
+        print("Aborted.")
+        sys.exit(2)
+
+
+def resolve_rooms(tokens):
+    """
+    Resolves the --rooms arguments, exiting with an error if they are invalid.  Returns a tuple of
+    (rooms, global_rooms, all_rooms) where `global_rooms` is true (and `rooms` is empty) if given
+    '+', and `all_rooms` is true if given '*'.  Requires that open_db() has already been called.
+    """
+    from ..model import get_rooms, get_rooms_by_token
+    from ..model.exc import NoSuchRoom
+
+    rooms = []
+    all_rooms = False
+    global_rooms = False
+    if len(tokens) > 1 and ('*' in tokens or '+' in tokens):
+        print(
+            "Error: '+'/'*' arguments to --rooms cannot be used with other rooms", file=sys.stderr
+        )
+        sys.exit(1)
+
+    if tokens == ['+']:
+        global_rooms = True
+    elif tokens == ['*']:
+        rooms = get_rooms()
+        all_rooms = True
+    else:
+        try:
+            rooms = get_rooms_by_token(tokens)
+        except NoSuchRoom as nsr:
+            print(f"No such room: '{nsr.token}'", file=sys.stderr)
+            sys.exit(1)
+
+    if not len(rooms) and not global_rooms:
+        print("Error: --rooms is required when updating room settings/permissions", file=sys.stderr)
+        sys.exit(1)
+
+    return rooms, global_rooms, all_rooms
+
+
+def update_rooms(args, perms):
+    """Implements the room modification options applied to the rooms given with --rooms"""
+    open_db()
+
+    from .. import db
+    from ..model import User, SystemUser
+    from ..model.exc import NoSuchUser
+
+    rooms, global_rooms, all_rooms = resolve_rooms(args.rooms)
+
+    if args.add_moderators:
+        sysadmin = SystemUser()
+        if global_rooms:
+            # Global mods are hidden unless requested otherwise
+            visible = args.visibility == 'visible'
+        else:
+            # Room mods are visible unless requested otherwise
+            visible = args.visibility != 'hidden'
+        admin = args.admin
+        vis_word = "visible" if visible else "hidden"
+        role_word = "admin" if admin else "moderator"
+
+        # Make all the changes in a single transaction (rather than committing each one), and only
+        # report them once it has been committed.
+        added = []
+        with db.transaction():
+            if global_rooms:
+                for sid in args.add_moderators:
+                    u = User(session_id=sid, try_blinding=True)
+                    u.set_moderator(admin=admin, visible=visible, added_by=sysadmin)
+                    added.append(f"Added {sid} as {vis_word} global {role_word}\n")
+            else:
+                room_names = [(room, f"{room.name} ({room.token})") for room in rooms]
+                for sid in args.add_moderators:
+                    u = User(session_id=sid, try_blinding=True)
+                    for room, room_name in room_names:
+                        room.set_moderator(u, admin=admin, visible=visible, added_by=sysadmin)
+                        added.append(
+                            f"Added {u.session_id} as {vis_word} {role_word} of {room_name}\n"
+                        )
+
+        sys.stdout.write("".join(added))
+
+    if args.delete_moderators:
+        sysadmin = SystemUser()
+        removed = []
+        with db.transaction():
+            if global_rooms:
+                for sid in args.delete_moderators:
+                    u = User(session_id=sid, try_blinding=True)
+                    was_admin = u.global_admin
+                    if not u.global_admin and not u.global_moderator:
+                        removed.append(f"{u.session_id} was not a global moderator\n")
+                    else:
+                        u.remove_moderator(removed_by=sysadmin)
+                        removed.append(
+                            f"Removed {u.session_id} as global "
+                            f"{'admin' if was_admin else 'moderator'}\n"
+                        )
+
+                    if u.is_blinded and sid.startswith('05'):
+                        try:
+                            u2 = User(session_id=sid, try_blinding=False, autovivify=False)
+                            if u2.global_admin or u2.global_moderator:
+                                was_admin = u2.global_admin
+                                u2.remove_moderator(removed_by=sysadmin)
+                                removed.append(
+                                    f"Removed {u2.session_id} as global "
+                                    f"{'admin' if was_admin else 'moderator'}\n"
+                                )
+                        except NoSuchUser:
+                            pass
+            else:
+                room_names = [(room, f"{room.name} ({room.token})") for room in rooms]
+                for sid in args.delete_moderators:
+                    u = User(session_id=sid, try_blinding=True)
+                    u2 = None
+                    if u.is_blinded and sid.startswith('05'):
+                        try:
+                            u2 = User(session_id=sid, try_blinding=False, autovivify=False)
+                        except NoSuchUser:
+                            pass
+
+                    for room, room_name in room_names:
+                        room.remove_moderator(u, removed_by=sysadmin)
+                        removed.append(
+                            f"Removed {u.session_id} as moderator/admin of {room_name}\n"
+                        )
+                        if u2 is not None:
+                            room.remove_moderator(u2, removed_by=sysadmin)
+                            removed.append(
+                                f"Removed {u2.session_id} as moderator/admin of {room_name}\n"
+                            )
+
+        sys.stdout.write("".join(removed))
+
+    if args.add_perms or args.clear_perms or args.remove_perms:
+        if global_rooms:
+            print(
+                "Error: --rooms cannot be '+' (i.e. global) when updating room permissions",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        users = []
+        if args.users:
+            users = [User(session_id=sid, try_blinding=True) for sid in args.users]
+
+        # users not specified means set room defaults
+        if not len(users):
+            for room in rooms:
+                if "read" in perms:
+                    room.default_read = perms["read"]
+                    print(
+                        ('Enabled' if room.default_read else 'Disabled')
+                        + f" default read permission in {room.token}"
+                    )
+                if "write" in perms:
+                    room.default_write = perms["write"]
+                    print(
+                        ('Enabled' if room.default_write else 'Disabled')
+                        + f" default write permission in {room.token}"
+                    )
+                if "accessible" in perms:
+                    room.default_accessible = perms["accessible"]
+                    print(
+                        ('Enabled' if room.default_accessible else 'Disabled')
+                        + f" default accessible permission in {room.token}"
+                    )
+                if "upload" in perms:
+                    room.default_upload = perms["upload"]
+                    print(
+                        ('Enabled' if room.default_upload else 'Disabled')
+                        + f" default upload permission in {room.token}"
+                    )
+        else:
+            sysadmin = SystemUser()
+            for room in rooms:
+                for user in users:
+                    room.set_permissions(user, mod=sysadmin, **perms)
+                    print(f"Updated room permissions for {user} in {room.token}")
+
+    if args.description is not None:
+        if global_rooms or all_rooms:
+            print(
+                "Error: --rooms cannot be '+' or '*' (i.e. global/all) with --description",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        for room in rooms:
+            room.description = None if not args.description else args.description
+            print(f"Updated {room.token} description to:\n\n{room.description}\n")
+
+    if args.name is not None:
+        if global_rooms or all_rooms:
+            print(
+                "Error: --rooms cannot be '+' or '*' (i.e. global/all) with --name",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        for room in rooms:
+            old = room.name
+            room.name = args.name
+            print(f"Changed {room.token} name from '{old}' to '{room.name}'")
+
+
+def list_rooms(args):
+    """Implements --list-rooms"""
+    open_db(readonly=True)
+
+    from ..model import get_rooms_with_stats
+
+    rooms = get_rooms_with_stats(active_cutoffs, list_moderators=args.verbose)
+    if rooms:
+        sys.stdout.write(
+            "".join(format_room(room, stats, verbose=args.verbose) for room, stats in rooms)
+        )
+    else:
+        print("No rooms.")
+
+
+def list_global_mods(args):
+    """Implements --list-global-mods"""
+    open_db(readonly=True)
+
+    from ..model import get_all_global_moderators
+
+    m, a, hm, ha = get_all_global_moderators()
+    admins = len(a) + len(ha)
+    mods = len(m) + len(hm)
+
+    out = [f"{admins} global admins ({len(ha)} hidden), {mods} moderators ({len(hm)} hidden):\n"]
+    out.extend(f"- {u.session_id} (admin)\n" for u in a)
+    out.extend(f"- {u.session_id} (hidden admin)\n" for u in ha)
+    out.extend(f"- {u.session_id} (moderator)\n" for u in m)
+    out.extend(f"- {u.session_id} (hidden moderator)\n" for u in hm)
+    sys.stdout.write("".join(out))
+
+
+def main():
+    args = parse_args()
+
+    update_room = check_args(args)
+    perms = parse_perm_flags(args)
+
+    db_updated = init_db(args)
+
+    if args.initialize:
+        print("Database schema created.")
+
+    elif args.upgrade:
+        print("Database successfully upgraded." if db_updated else "No database upgrades required.")
+
+    elif args.check_upgrades:
+        print("No database upgrades required.")
+
+    elif args.add_room:
+        add_room(args, perms)
+
+    elif args.delete_room:
+        delete_room(args)
+
+    elif update_room:
+        update_rooms(args, perms)
+
+    elif args.list_rooms:
+        list_rooms(args)
+
+    elif args.list_global_mods:
+        list_global_mods(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,10 +13,31 @@ HAVE_FILE_ID_HACKS = False
 ROOM_IMPORT_HACKS = {}
 
 
-def get_conn():
+def get_conn(readonly=False):
     """Gets a connection from the database engine connection pool.  This is not intended to be used
-    by flask endpoints: they should use web.appdb instead (which calls this upon first use)."""
-    return engine.connect()
+    by flask endpoints: they should use web.appdb instead (which calls this upon first use).
+
+    If `readonly` is True then the connection is put into read-only mode, for callers (such as
+    listing commands) that only query the database.  Such a connection is detached from the pool
+    so that the read-only setting does not carry over to other connection users.  This is skipped
+    (and the connection is an ordinary one) if the pool hands out the same underlying connection to
+    everyone, as with an in-memory sqlite database, since that would make every user read-only."""
+    conn = engine.connect()
+    if readonly and not isinstance(
+        engine.pool, (sqlalchemy.pool.SingletonThreadPool, sqlalchemy.pool.StaticPool)
+    ):
+        conn.detach()
+        if engine.name == "sqlite":
+            query("PRAGMA query_only = true", dbconn=conn)
+        elif engine.name == "postgresql":
+            # This only applies to transactions started after it, and the driver has already begun
+            # one that the following queries would run in, so we commit that before returning.
+            dbapi_conn = conn.connection
+            cur = dbapi_conn.cursor()
+            cur.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+            cur.close()
+            dbapi_conn.commit()
+    return conn
 
 
 def query(query, *, dbconn=None, bind_expanding=None, **params):
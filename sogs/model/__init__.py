@@ -21,3 +21,28 @@ capabilities = {
 if config.REQUIRE_BLIND_KEYS:
     # indicate blinding required if configured to do so
     capabilities.add('blind')
+
+
+# Model classes and functions available directly from `sogs.model`; the submodule providing each is
+# only imported on first access.  The model submodules import `web`, which imports the model again
+# through the routes, so `web` has to be loaded before them.
+_lazy_attrs = {
+    'Room': 'room',
+    'get_rooms': 'room',
+    'get_rooms_by_token': 'room',
+    'get_rooms_with_stats': 'room',
+    'User': 'user',
+    'SystemUser': 'user',
+    'get_all_global_moderators': 'user',
+}
+
+
+def __getattr__(name):
+    if name in _lazy_attrs:
+        import importlib
+        from .. import web  # noqa: F401
+
+        value = getattr(importlib.import_module(f'.{_lazy_attrs[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -426,6 +426,29 @@ class Room:
             since=time.time() - cutoff,
         ).first()[0]
 
+    def active_users_counts(self, cutoffs: List[float]):
+        """
+        Queries the number of active users in the past `cutoff` seconds for each of the given
+        cutoffs, as with `active_users_last`, but using a single query for all of them.  Returns a
+        list of counts in the same order as `cutoffs`.
+        """
+
+        if not cutoffs:
+            return []
+
+        counts, since = _active_users_counts_columns(cutoffs)
+        return list(
+            query(
+                f"""
+                SELECT {counts} FROM room_users
+                WHERE room = :r AND last_active >= :oldest
+                """,
+                r=self.id,
+                oldest=min(since.values()),
+                **since,
+            ).first()
+        )
+
     def check_permission(
         self,
         user: Optional[User] = None,
@@ -550,6 +573,33 @@ class Room:
             ).first()[0:2]
         )
 
+    def stats(self, active_cutoffs: List[float] = [], *, list_moderators: bool = False):
+        """
+        Returns a dict of room statistics, mainly intended for administrative use, containing keys:
+
+        - messages -- [count, size] of messages, as returned by messages_size()
+        - attachments -- [count, size] of attachments, as returned by attachments_size()
+        - reactions -- list of (reaction, count) pairs, as returned by reactions_counts()
+        - active_users -- list of active user counts for each of the given `active_cutoffs` (in
+          seconds), as returned by active_users_counts()
+        - moderator_counts -- tuple of moderator and admin counts, as returned by
+          moderator_counts()
+        - moderators -- tuple of lists of moderators and admins, as returned by
+          get_all_moderators().  Only included if `list_moderators` is True.
+
+        See also get_rooms_with_stats() which retrieves these for all rooms at once.
+        """
+        stats = {
+            'messages': self.messages_size(),
+            'attachments': list(self.attachments_size()),
+            'reactions': self.reactions_counts(),
+            'active_users': self.active_users_counts(active_cutoffs),
+            'moderator_counts': self.moderator_counts(),
+        }
+        if list_moderators:
+            stats['moderators'] = self.get_all_moderators()
+        return stats
+
     def get_messages_for(
         self,
         user: Optional[User],
@@ -1560,6 +1610,23 @@ class Room:
 
         return (m, a, hm, ha)
 
+    def moderator_counts(self):
+        """Returns a tuple of the number of visible mods, visible admins, hidden mods, and hidden
+        admins of the room, i.e. the lengths of the lists returned by get_all_moderators(), without
+        retrieving the moderators themselves.
+        """
+
+        return tuple(
+            query(
+                f"""
+                SELECT {_moderator_counts_columns}
+                FROM user_permission_overrides
+                WHERE room = :r AND moderator
+                """,
+                r=self.id,
+            ).first()
+        )
+
     def set_moderator(self, user: User, *, added_by: User, admin=False, visible=True):
         """
         Sets `user` as a moderator or admin of this room.  Replaces current admin/moderator/visible
@@ -2227,6 +2294,151 @@ def get_rooms():
     return [Room(row) for row in query("SELECT * FROM rooms ORDER BY token")]
 
 
+def _active_users_counts_columns(cutoffs: List[float]):
+    """
+    Returns the SELECT expressions and bind parameters for counting room_users rows active within
+    each of the given cutoffs.
+    """
+    now = time.time()
+    since = {f'since{i}': now - cutoff for i, cutoff in enumerate(cutoffs)}
+    counts = ", ".join(f"COUNT(CASE WHEN last_active >= :{s} THEN 1 END)" for s in since)
+    return counts, since
+
+
+# Conditional aggregate columns counting (visible mods, visible admins, hidden mods, hidden admins),
+# in the same order as the lists returned by Room.get_all_moderators().
+_moderator_counts_columns = """
+    COUNT(CASE WHEN visible_mod AND NOT admin THEN 1 END),
+    COUNT(CASE WHEN visible_mod AND admin THEN 1 END),
+    COUNT(CASE WHEN NOT visible_mod AND NOT admin THEN 1 END),
+    COUNT(CASE WHEN NOT visible_mod AND admin THEN 1 END)
+"""
+
+
+def get_rooms_with_stats(active_cutoffs: List[float] = [], *, list_moderators: bool = False):
+    """
+    Returns a list of (room, stats) pairs for all rooms, ordered as in get_rooms(), where `stats` is
+    a dict of room statistics as returned by Room.stats() (with the same `list_moderators`
+    behaviour).  Rather than querying each room
+    individually this uses a fixed number of aggregate queries covering all of the rooms.  Does not
+    check permissions.
+    """
+    rooms = get_rooms()
+    if not rooms:
+        return []
+
+    stats = {
+        room.id: {
+            'messages': [0, 0],
+            'attachments': [0, 0],
+            'reactions': [],
+            'active_users': [0] * len(active_cutoffs),
+            'moderator_counts': (0, 0, 0, 0),
+            **({'moderators': ([], [], [], [])} if list_moderators else {}),
+        }
+        for room in rooms
+    }
+
+    for r, count, size in query(
+        """
+        SELECT room, COUNT(*), COALESCE(SUM(data_size), 0)
+        FROM messages
+        WHERE data IS NOT NULL AND NOT filtered
+        GROUP BY room
+        """
+    ):
+        if r in stats:
+            stats[r]['messages'] = [count, size]
+
+    for r, count, size in query(
+        """
+        SELECT room, COUNT(*), COALESCE(SUM(size), 0)
+        FROM files
+        WHERE room IS NOT NULL
+        GROUP BY room
+        """
+    ):
+        if r in stats:
+            stats[r]['attachments'] = [count, size]
+
+    for r, reaction, count in query(
+        """
+        SELECT room, reaction, COUNT(*)
+        FROM message_reactions JOIN messages ON messages.id = message
+        GROUP BY room, reaction
+        """
+    ):
+        if r in stats:
+            stats[r]['reactions'].append((reaction, count))
+
+    if active_cutoffs:
+        counts, since = _active_users_counts_columns(active_cutoffs)
+        for r, *active in query(
+            f"""
+            SELECT room, {counts} FROM room_users
+            WHERE last_active >= :oldest
+            GROUP BY room
+            """,
+            oldest=min(since.values()),
+            **since,
+        ):
+            if r in stats:
+                stats[r]['active_users'] = active
+
+    for r, *counts in query(
+        f"""
+        SELECT room, {_moderator_counts_columns}
+        FROM user_permission_overrides
+        WHERE moderator
+        GROUP BY room
+        """
+    ):
+        if r in stats:
+            stats[r]['moderator_counts'] = tuple(counts)
+
+    if list_moderators:
+        for r, session_id, visible, admin in query(
+            """
+            SELECT room, session_id, o.visible_mod, o.admin
+            FROM user_permission_overrides o JOIN users ON o."user" = users.id
+            WHERE o.moderator
+            ORDER BY session_id
+            """
+        ):
+            if r in stats:
+                m, a, hm, ha = stats[r]['moderators']
+                ((a if admin else m) if visible else (ha if admin else hm)).append(session_id)
+
+    return [(room, stats[room.id]) for room in rooms]
+
+
+def get_rooms_by_token(tokens: List[str]):
+    """
+    Returns a list of Room objects for the given room tokens, in the same order as `tokens`, using a
+    single database query.  Tokens are matched case-insensitively, as with `Room(token=...)`.
+
+    Raises a NoSuchRoom for the first of the given tokens that doesn't exist.  Does not check
+    permissions.
+    """
+    if not tokens:
+        return []
+
+    rooms = {
+        row['token'].lower(): Room(row)
+        for row in query(
+            "SELECT * FROM rooms WHERE token IN :tokens", tokens=tokens, bind_expanding=['tokens']
+        )
+    }
+
+    result = []
+    for token in tokens:
+        room = rooms.get(token.lower())
+        if room is None:
+            raise NoSuchRoom(token)
+        result.append(room)
+    return result
+
+
 def get_rooms_with_permission(
     user: User,
     *,
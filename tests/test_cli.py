@@ -0,0 +1,142 @@
+import pytest
+import sys
+from sogs import web
+from sogs.cli import admin
+from sogs.model.room import Room
+from sogs.model.user import User
+
+
+@pytest.fixture
+def cli(db, monkeypatch, capsys):
+    """
+    Yields a function that runs the admin command-line interface with the given arguments against
+    the test database, returning what it wrote to stdout.
+    """
+
+    # The db fixture has already set up and initialized the database:
+    monkeypatch.setattr(admin, 'init_db', lambda args: False)
+    # The CLI replaces web.appdb with its own connection; restore the fixture's connection after:
+    monkeypatch.setattr(web, 'appdb', web.appdb)
+
+    def run(*args):
+        capsys.readouterr()
+        monkeypatch.setattr(sys, 'argv', ['sogs-admin', *args])
+        admin.main()
+        return capsys.readouterr().out
+
+    yield run
+
+    admin.close_db()
+
+
+def test_add_room(cli):
+    out = cli('--add-room', 'xyz', '--name', 'XYZ Room', '--description', 'line 1\\nline 2')
+    assert out.startswith("Created room xyz:\n\nxyz\n===\nName: XYZ Room\n")
+    assert "Description: line 1\nline 2\n" in out
+    assert "Moderators: 0 admins (0 hidden), 0 moderators (0 hidden)\n" in out
+
+    r = Room(token='xyz')
+    assert r.name == 'XYZ Room'
+    assert r.description == 'line 1\nline 2'
+
+
+def test_add_room_errors(cli, room, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli('--add-room', room.token)
+    assert e.value.code == 1
+    assert "Error: room 'test-room' already exists!" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as e:
+        cli('--add-room', 'bad token')
+    assert e.value.code == 1
+    assert "may only contain" in capsys.readouterr().err
+
+
+def test_room_moderators(cli, room, room2, user, user2):
+    out = cli('--rooms', room.token, room2.token, '--add-moderators', user.session_id)
+    assert out == (
+        f"Added {user.session_id} as visible moderator of Test room (test-room)\n"
+        f"Added {user.session_id} as visible moderator of Room 2 (room2)\n"
+    )
+
+    out = cli('--rooms', room.token, '--admin', '--hidden', '--add-moderators', user2.session_id)
+    assert out == f"Added {user2.session_id} as hidden admin of Test room (test-room)\n"
+
+    r, r2 = Room(token='test-room'), Room(token='room2')
+    assert r.get_all_moderators() == ([user.session_id], [], [], [user2.session_id])
+    assert r2.get_all_moderators() == ([user.session_id], [], [], [])
+
+    out = cli('--rooms', '*', '--delete-moderators', user.session_id)
+    assert out == (
+        f"Removed {user.session_id} as moderator/admin of Room 2 (room2)\n"
+        f"Removed {user.session_id} as moderator/admin of Test room (test-room)\n"
+    )
+
+    r, r2 = Room(token='test-room'), Room(token='room2')
+    assert r.get_all_moderators() == ([], [], [], [user2.session_id])
+    assert r2.get_all_moderators() == ([], [], [], [])
+
+
+def test_global_moderators(cli, user, user2):
+    assert cli('-M') == "0 global admins (0 hidden), 0 moderators (0 hidden):\n"
+
+    out = cli('--rooms', '+', '--add-moderators', user.session_id)
+    assert out == f"Added {user.session_id} as hidden global moderator\n"
+    out = cli('--rooms=+', '--admin', '--visibility=visible', '--add-moderators', user2.session_id)
+    assert out == f"Added {user2.session_id} as visible global admin\n"
+
+    assert cli('-M') == (
+        "1 global admins (0 hidden), 1 moderators (1 hidden):\n"
+        f"- {user2.session_id} (admin)\n"
+        f"- {user.session_id} (hidden moderator)\n"
+    )
+
+    out = cli('--rooms', '+', '--delete-moderators', user.session_id)
+    assert out == f"Removed {user.session_id} as global moderator\n"
+    u = User(session_id=user.session_id)
+    assert not u.global_moderator and not u.global_admin
+
+
+def test_list_rooms(cli, room, room2, mod, admin):
+    assert cli('-L').count("Moderators: ") == 2
+
+    out = cli('--list-rooms', '-v')
+    assert out.startswith("\nroom2\n=====\nName: Room 2\n")
+    assert "Moderators: 0 admins (0 hidden), 0 moderators (0 hidden)\n" in out
+    assert (
+        "Moderators: 1 admins (0 hidden), 1 moderators (0 hidden):\n"
+        f"    - {admin.session_id} (admin)\n"
+        f"    - {mod.session_id} (moderator)\n"
+    ) in out
+
+    out = cli('-L')
+    assert "Moderators: 1 admins (0 hidden), 1 moderators (0 hidden)\n" in out
+    assert mod.session_id not in out
+
+
+def test_list_no_rooms(cli):
+    assert cli('-L') == "No rooms.\n"
+
+
+def test_bad_args(cli, room, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli('--list-rooms', '--name', 'foo')
+    assert e.value.code == 1
+    assert "Error: room modifiers and --list-rooms are incompatible" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as e:
+        cli('--add-room', 'xyz', '--de', 'desc')
+    assert e.value.code == 2
+    assert "ambiguous option: --de" in capsys.readouterr().err
+
+    sid = '05' + '0' * 64
+    for args in (('--visible', '--hidden'), ('--visibility=hidden', '--visible')):
+        with pytest.raises(SystemExit) as e:
+            cli('--rooms', 'xyz', '--add-moderators', sid, *args)
+        assert e.value.code == 2
+        assert "conflicts with earlier visibility" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as e:
+        cli('--rooms', room.token, '--add-moderators', '05zz')
+    assert e.value.code == 1
+    assert "Error: '05zz' is not a valid session id" in capsys.readouterr().err
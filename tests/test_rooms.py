@@ -1,7 +1,9 @@
 import pytest
 import time
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 import sogs.model.exc as exc
-from sogs.model.room import Room, get_rooms
+from sogs.model.room import Room, get_rooms, get_rooms_by_token, get_rooms_with_stats
 from sogs.model.file import File
 from sogs import config
 from request import sogs_put
@@ -55,6 +57,19 @@ def test_token_insensitive(room):
         Room(token='Test-Ro-om')
 
 
+def test_get_by_token(room, room2):
+
+    rooms = get_rooms_by_token(['room2', 'TEST-room'])
+    assert [r.id for r in rooms] == [room2.id, room.id]
+    assert [r.token for r in rooms] == ['room2', 'test-room']
+
+    assert get_rooms_by_token([]) == []
+
+    with pytest.raises(exc.NoSuchRoom) as e:
+        get_rooms_by_token(['test-room', 'no-such-room', 'room2', 'nope'])
+    assert e.value.token == 'no-such-room'
+
+
 def test_delete(room, room2):
     assert len(get_rooms()) == 2
 
@@ -642,3 +657,81 @@ def test_active_users(room, user, user2):
 
     assert room.active_users == 2
     assert room.active_users_last(1) == 2
+
+
+def test_active_users_counts(db, room, room2, user, user2):
+    assert room.active_users_counts([60, 86400]) == [0, 0]
+    assert room.active_users_counts([]) == []
+
+    user.update_room_activity(room)
+    user2.update_room_activity(room)
+    user2.update_room_activity(room2)
+    db.query('UPDATE room_users SET last_active = last_active - 3600 WHERE "user" = :u', u=user2.id)
+
+    assert room.active_users_counts([60, 86400, 7200]) == [1, 2, 2]
+    assert room.active_users_counts([60]) == [room.active_users_last(60)]
+    assert room2.active_users_counts([60, 86400]) == [0, 1]
+
+
+def test_readonly_conn(db, room):
+    conn = db.get_conn(readonly=True)
+    assert db.query("SELECT token FROM rooms", dbconn=conn).all() == [(room.token,)]
+    # The in-memory sqlite database used by the tests (unlike postgresql) shares one connection
+    # among all users, and so can't have a separate read-only connection:
+    if not isinstance(db.engine.pool, (SingletonThreadPool, StaticPool)):
+        with pytest.raises(DBAPIError):
+            db.query("UPDATE rooms SET name = 'Renamed'", dbconn=conn)
+    conn.close()
+
+    # Other connections are not affected:
+    room.name = 'Renamed'
+    assert Room(id=room.id).name == 'Renamed'
+
+
+def test_stats(room, room2, user, user2, mod, admin, no_rate_limit):
+    for i in range(3):
+        room.add_post(user, f"data {i}".encode(), pad64(f"sig {i}"))
+    msg = room2.add_post(user2, b"data", pad64("sig"))
+    room2.add_reaction(user, msg['id'], '🍆')
+    room2.add_reaction(user2, msg['id'], '🍆')
+    room2.add_reaction(user2, msg['id'], '🦒')
+    room.set_moderator(user2, added_by=admin, visible=False)
+    user.update_room_activity(room)
+
+    cutoffs = [60, 86400]
+    all_stats = get_rooms_with_stats(cutoffs)
+    assert [r.id for r, _ in all_stats] == [room2.id, room.id]
+    for r, stats in all_stats:
+        assert stats == r.stats(cutoffs)
+        assert 'moderators' not in stats
+    full_stats = get_rooms_with_stats(cutoffs, list_moderators=True)
+    for (r, stats), (_, full) in zip(all_stats, full_stats):
+        assert full == r.stats(cutoffs, list_moderators=True)
+        assert full == {**stats, 'moderators': full['moderators']}
+
+    s1, s2 = all_stats[1][1], all_stats[0][1]
+    assert s1['messages'][0] == 3
+    assert s2['messages'][0] == 1
+    assert s1['attachments'] == s2['attachments'] == [0, 0]
+    assert s1['reactions'] == []
+    assert sorted(s2['reactions']) == [('🍆', 2), ('🦒', 1)]
+    assert s1['active_users'] == [1, 1]
+    assert s2['active_users'] == [0, 0]
+    assert s1['moderator_counts'] == (1, 1, 1, 0)
+    assert s2['moderator_counts'] == (0, 0, 0, 0)
+    f1, f2 = full_stats[1][1], full_stats[0][1]
+    assert f1['moderators'] == ([mod.session_id], [admin.session_id], [user2.session_id], [])
+    assert f2['moderators'] == ([], [], [], [])
+
+
+def test_moderator_counts(room, room2, user, user2, mod, admin, global_admin):
+    assert room.moderator_counts() == (1, 1, 0, 0)
+    assert room2.moderator_counts() == (0, 0, 0, 0)
+
+    room.set_moderator(user, added_by=admin, visible=False)
+    room.set_moderator(user2, added_by=admin, admin=True, visible=False)
+    room2.set_moderator(user, added_by=global_admin, admin=True)
+
+    assert room.moderator_counts() == tuple(len(x) for x in room.get_all_moderators())
+    assert room.moderator_counts() == (1, 1, 1, 1)
+    assert room2.moderator_counts() == (0, 1, 0, 0)